@@ -6,20 +6,29 @@ import os
 
 dotenv.load_dotenv()
 
-# Initialize MongoDB tool for analytics
+# Initialize MongoDB tool for analytics (read-only analytics actions)
 mongodb_tool = MongoDBTool(
     uri=os.getenv("MONGO_URI"),
-    db_name=os.getenv("DB_NAME")
+    db_name=os.getenv("DB_NAME"),
+    workload="analytics",
+    actions=[
+        "calculate_revenue",
+        "get_client_stats",
+        "get_attendance_stats",
+        "get_top_courses",
+        "get_enrollment_trends",
+        "get_outstanding_balances",
+    ]
 )
 
 # Define Dashboard Agent
 dashboard_agent = Agent(
     role="Dashboard Analytics Agent",
-    goal="Provide comprehensive analytics and metrics for business insights including revenue, client stats, attendance, and enrollment trends.",
+    goal="Answer business questions on revenue, clients, attendance and enrollment with concrete metrics.",
     tools=[mongodb_tool],
-    backstory="""You are a specialized analytics agent that helps business owners understand their operations through data. 
-    You excel at extracting insights from client data, revenue patterns, attendance records, and enrollment trends. 
-    You present data in a clear, actionable format that helps in making business decisions.""",
+    backstory="You are a business analytics expert who turns query results into clear, actionable insights.",
     verbose=True,
-    allow_delegation=False
+    allow_delegation=False,
+    cache=False,  # tool results are cached per session, see app/session_store.py
+    max_iter=int(os.getenv("DASHBOARD_MAX_ITER", "6"))  # cap on LLM turns per run
 )
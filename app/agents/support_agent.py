@@ -8,7 +8,18 @@ dotenv.load_dotenv()
 
 mongodb_tool = MongoDBTool(
     uri=os.getenv("MONGO_URI"),
-    db_name=os.getenv("DB_NAME")
+    db_name=os.getenv("DB_NAME"),
+    workload="support",
+    actions=[
+        "find_client",
+        "get_client_orders",
+        "get_order_by_id",
+        "get_payment_info",
+        "get_outstanding_balances",
+        "get_classes_for_week",
+        "get_courses_by_instructor",
+        "get_upcoming_classes",
+    ]
 )
 
 external_api_tool = ExternalAPITool(
@@ -19,18 +30,11 @@ external_api_tool = ExternalAPITool(
 # Define Support Agent
 support_agent = Agent(
     role="Customer Support Agent",
-    goal="""Handle all customer support queries including:
-    - Client data searches and inquiries
-    - Order management and status checks
-    - Payment information and pending dues
-    - Course and class discovery
-    - Creating new client enquiries and orders
-    """,
+    goal="Resolve customer queries about clients, orders, payments, courses and classes, and create orders or enquiries when asked.",
     tools=[mongodb_tool, external_api_tool],
-    backstory="""You are a dedicated customer support agent with expertise in handling service-related queries.
-    You have access to client databases and can create new orders and enquiries.
-    You provide helpful, accurate information and can take action to resolve customer needs.
-    Always be professional, helpful, and thorough in your responses.""",
+    backstory="You are a professional, thorough support agent with access to the client database and order system.",
     verbose=True,
-    allow_delegation=False
+    allow_delegation=False,
+    cache=False,  # tool results are cached per session, see app/session_store.py
+    max_iter=int(os.getenv("SUPPORT_MAX_ITER", "10"))  # cap on LLM turns per run
 )
@@ -0,0 +1,80 @@
+import queue
+from typing import Any, Callable, Dict
+
+from crewai import Task, Crew
+
+from app.agents.support_agent import support_agent, mongodb_tool as support_mongodb_tool
+from app.agents.dashboard_agent import dashboard_agent, mongodb_tool as dashboard_mongodb_tool
+from app.scheduler import AGENT_CONCURRENCY
+
+# Task templates; {query} and {session_context} are filled in at kickoff
+SUPPORT_TASK = """Handle this customer support query: {query}
+
+Look up clients, orders, payments, balances, courses and classes with MongoDBTool, and create clients, orders or enquiries with ExternalAPITool only when asked.
+
+{session_context}"""
+
+DASHBOARD_TASK = """Provide analytics for this business query: {query}
+
+Use MongoDBTool for revenue, client, attendance, enrollment and balance metrics.
+
+{session_context}"""
+
+
+def _single_agent_crew(agent, task) -> Crew:
+    # No CrewAI tool cache: these crews live for the whole process, so it would
+    # share results across sessions with no expiry. Reuse goes through the session cache.
+    return Crew(agents=[agent], tasks=[task], verbose=True, cache=False)
+
+
+def build_support_crew() -> Crew:
+    agent = support_agent.copy()
+    task = Task(
+        description=SUPPORT_TASK,
+        agent=agent,
+        expected_output="A helpful answer to the support query with the specific data found and any actions taken."
+    )
+    return _single_agent_crew(agent, task)
+
+
+def build_dashboard_crew() -> Crew:
+    agent = dashboard_agent.copy()
+    task = Task(
+        description=DASHBOARD_TASK,
+        agent=agent,
+        expected_output="A concise analytics report with specific metrics, trends and insights."
+    )
+    return _single_agent_crew(agent, task)
+
+
+class CrewPool:
+    """Crews built once at startup and reused across requests.
+
+    A crew holds per-run state while kicked off, so the pool keeps one crew per
+    concurrent slot the scheduler allows for the agent type.
+    """
+
+    def __init__(self, build: Callable[[], Crew], size: int):
+        self._crews: "queue.Queue[Crew]" = queue.Queue()
+        for _ in range(size):
+            self._crews.put(build())
+
+    def kickoff(self, inputs: Dict[str, Any]):
+        crew = self._crews.get()
+        try:
+            return crew.kickoff(inputs=inputs)
+        finally:
+            self._crews.put(crew)
+
+
+crew_pools = {
+    "support": CrewPool(build_support_crew, AGENT_CONCURRENCY["support"]),
+    "dashboard": CrewPool(build_dashboard_crew, AGENT_CONCURRENCY["dashboard"]),
+}
+
+# Session cache namespaces of each agent type's tools; follow-up context only
+# lists cached calls the agent can actually make
+cache_namespaces = {
+    "support": [support_mongodb_tool.cache_namespace],
+    "dashboard": [dashboard_mongodb_tool.cache_namespace],
+}
@@ -0,0 +1,208 @@
+import asyncio
+import datetime
+import json
+import os
+import time
+from typing import Any, AsyncIterator, Dict, List, Literal, Optional
+
+import dotenv
+from bson import ObjectId
+from bson.errors import InvalidId
+from pydantic import BaseModel, Field, ValidationError
+from pymongo import MongoClient, UpdateOne
+from pymongo.errors import BulkWriteError, OperationFailure
+
+from app.tools.mongodb_tool import ORDER_STATUSES, PAYMENT_STATUSES
+
+dotenv.load_dotenv()
+
+INGEST_CHUNK_SIZE = int(os.getenv("INGEST_CHUNK_SIZE", "1000"))
+INGEST_MAX_POOL_SIZE = int(os.getenv("INGEST_MONGO_MAX_POOL_SIZE", "4"))
+INGEST_MAX_REPORTED_ERRORS = int(os.getenv("INGEST_MAX_REPORTED_ERRORS", "1000"))
+
+OBJECT_ID_PATTERN = r"^[0-9a-fA-F]{24}$"
+
+
+class ClientRecord(BaseModel):
+    id: Optional[str] = Field(None, alias="_id", pattern=OBJECT_ID_PATTERN)
+    name: str
+    email: str
+    phone: Optional[str] = None
+    enrolled_services: List[str] = []
+    status: str = "active"
+
+
+class OrderRecord(BaseModel):
+    id: str = Field(alias="_id", pattern=OBJECT_ID_PATTERN)
+    client_id: str = Field(pattern=OBJECT_ID_PATTERN)
+    course_id: str = Field(pattern=OBJECT_ID_PATTERN)
+    status: Literal[tuple(ORDER_STATUSES)] = "pending"
+    amount: float = Field(ge=0)
+    order_date: datetime.datetime
+
+
+class PaymentRecord(BaseModel):
+    id: str = Field(alias="_id", pattern=OBJECT_ID_PATTERN)
+    order_id: str = Field(pattern=OBJECT_ID_PATTERN)
+    client_id: str = Field(pattern=OBJECT_ID_PATTERN)
+    amount: float = Field(ge=0)
+    payment_date: datetime.datetime
+    status: Literal[tuple(PAYMENT_STATUSES)] = "completed"
+
+
+class ClassRecord(BaseModel):
+    id: str = Field(alias="_id", pattern=OBJECT_ID_PATTERN)
+    course_id: str = Field(pattern=OBJECT_ID_PATTERN)
+    name: str
+    instructor: str
+    date: datetime.datetime
+    status: str = "scheduled"
+    attendees: List[str] = []
+
+
+INGEST_MODELS = {
+    "clients": ClientRecord,
+    "orders": OrderRecord,
+    "payments": PaymentRecord,
+    "classes": ClassRecord,
+}
+
+# Reference fields stored as ObjectId, per collection
+OBJECT_ID_FIELDS = {
+    "clients": [],
+    "orders": ["client_id", "course_id"],
+    "payments": ["order_id", "client_id"],
+    "classes": ["course_id"],
+}
+
+
+def _to_bson(collection: str, doc: Dict[str, Any]) -> Dict[str, Any]:
+    for field in OBJECT_ID_FIELDS[collection]:
+        if field in doc:
+            doc[field] = ObjectId(doc[field])
+    if collection == "classes" and "attendees" in doc:
+        doc["attendees"] = [ObjectId(a) for a in doc["attendees"]]
+    return doc
+
+
+def to_upsert(collection: str, record: BaseModel) -> UpdateOne:
+    """Turn a validated record into an idempotent upsert.
+
+    Only fields present in the record are $set; defaults for omitted fields go in
+    $setOnInsert so re-sending a partial record never overwrites stored values.
+    """
+    sent = _to_bson(collection, record.model_dump(exclude={"id"}, exclude_unset=True))
+    defaults = _to_bson(collection, record.model_dump(exclude={"id"} | set(sent)))
+    update = {"$set": sent}
+    if defaults:
+        update["$setOnInsert"] = defaults
+
+    if record.id:
+        return UpdateOne({"_id": ObjectId(record.id)}, update, upsert=True)
+    # Clients without an _id are matched on email (unique index, see BulkIngestor)
+    return UpdateOne({"email": sent["email"]}, update, upsert=True)
+
+
+class IngestError(Exception):
+    """Raised when a collection cannot be ingested at all"""
+
+
+class BulkIngestor:
+    """Validates NDJSON records and writes them with unordered bulk upserts"""
+
+    def __init__(self, uri: str, db_name: str, chunk_size: int = INGEST_CHUNK_SIZE):
+        self._chunk_size = chunk_size
+        self._client = MongoClient(uri, maxPoolSize=INGEST_MAX_POOL_SIZE, appname="agentic-ai-ingest")
+        self._db = self._client[db_name]
+        self._client_index_ready = False
+
+    def _ensure_client_email_index(self):
+        # Clients without _id are upserted by email; without a unique index two
+        # concurrent ingests of the same client could both insert it
+        try:
+            self._db.clients.create_index("email", unique=True)
+        except OperationFailure as e:
+            raise IngestError(f"Cannot create the unique clients.email index: {e}") from e
+        self._client_index_ready = True
+
+    def _write_chunk(self, collection: str, ops: List[UpdateOne], lines: List[int], report: Dict[str, Any]):
+        try:
+            result = self._db[collection].bulk_write(ops, ordered=False)
+            details = result.bulk_api_result
+        except BulkWriteError as e:
+            details = e.details
+            for error in details.get("writeErrors", []):
+                self._add_error(report, lines[error["index"]], error.get("errmsg", "write error"))
+        report["matched"] += details.get("nMatched", 0)
+        report["modified"] += details.get("nModified", 0)
+        report["upserted"] += details.get("nUpserted", 0)
+
+    def _add_error(self, report: Dict[str, Any], line: int, error: str):
+        report["failed"] += 1
+        if len(report["errors"]) < INGEST_MAX_REPORTED_ERRORS:
+            report["errors"].append({"line": line, "error": error})
+
+    async def ingest(self, collection: str, chunks: AsyncIterator[bytes]) -> Dict[str, Any]:
+        """Consume an NDJSON byte stream, writing every INGEST_CHUNK_SIZE valid records"""
+        model = INGEST_MODELS[collection]
+        if collection == "clients" and not self._client_index_ready:
+            await asyncio.to_thread(self._ensure_client_email_index)
+        report = {
+            "collection": collection,
+            "received": 0,
+            "matched": 0,
+            "modified": 0,
+            "upserted": 0,
+            "failed": 0,
+            "errors": [],
+        }
+        started = time.monotonic()
+        ops, lines = [], []
+        buffer = b""
+        line_no = 0
+
+        async def flush():
+            if ops:
+                await asyncio.to_thread(self._write_chunk, collection, list(ops), list(lines), report)
+                ops.clear()
+                lines.clear()
+
+        async def handle(raw: bytes):
+            nonlocal line_no
+            line_no += 1
+            if not raw.strip():
+                return
+            report["received"] += 1
+            try:
+                record = model.model_validate(json.loads(raw))
+                ops.append(to_upsert(collection, record))
+                lines.append(line_no)
+            except (ValueError, ValidationError, InvalidId) as e:
+                self._add_error(report, line_no, str(e))
+                return
+            if len(ops) >= self._chunk_size:
+                await flush()
+
+        async for chunk in chunks:
+            buffer += chunk
+            *complete, buffer = buffer.split(b"\n")
+            for raw in complete:
+                await handle(raw)
+        if buffer:
+            await handle(buffer)
+        await flush()
+
+        elapsed = time.monotonic() - started
+        report["elapsed_seconds"] = round(elapsed, 3)
+        report["records_per_second"] = round(report["received"] / elapsed, 1) if elapsed > 0 else None
+        return report
+
+
+_ingestor: Optional[BulkIngestor] = None
+
+
+def get_ingestor() -> BulkIngestor:
+    global _ingestor
+    if _ingestor is None:
+        _ingestor = BulkIngestor(os.getenv("MONGO_URI"), os.getenv("DB_NAME"))
+    return _ingestor
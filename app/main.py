@@ -1,8 +1,11 @@
-from fastapi import FastAPI, HTTPException
-from crewai import Task, Crew
-from pydantic import BaseModel
-from app.agents.support_agent import support_agent
-from app.agents.dashboard_agent import dashboard_agent
+from fastapi import FastAPI, HTTPException, Request
+from pydantic import BaseModel, Field
+from typing import Optional
+from app.crews import crew_pools, cache_namespaces
+from app.session_store import session_store, current_session
+from app.scheduler import scheduler, PRIORITY_CLASSES, QueueFullError, QueueTimeoutError
+from app.ingest import INGEST_MODELS, IngestError, get_ingestor
+import functools
 import logging
 
 # Configure logging
@@ -14,60 +17,71 @@ app = FastAPI()
 class QueryRequest(BaseModel):
     query: str
     agent_type: str  # "support" or "dashboard"
+    session_id: Optional[str] = None  # pass back the returned id for follow-up turns
+    priority: Optional[str] = None  # "high", "normal" or "low"; defaults per agent type
+    deadline_seconds: Optional[float] = Field(None, gt=0)  # partial result is returned once exceeded
+
 @app.get("/")
 def home():
     return ("Hello backend is live")
+@app.get("/metrics")
+def metrics():
+    return scheduler.metrics()
+@app.post("/ingest/{collection}")
+async def ingest(collection: str, request: Request):
+    """Bulk upsert newline-delimited JSON records into clients, orders, payments or classes"""
+    if collection not in INGEST_MODELS:
+        raise HTTPException(status_code=400, detail=f"Invalid collection. Use one of: {', '.join(INGEST_MODELS)}")
+    try:
+        report = await get_ingestor().ingest(collection, request.stream())
+        logger.info(f"Ingested {report['received']} {collection} records ({report['failed']} failed) "
+                     f"at {report['records_per_second']} records/s")
+        return report
+    except IngestError as e:
+        logger.error(f"Error ingesting {collection}: {str(e)}")
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error ingesting {collection}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error ingesting {collection}: {str(e)}")
 @app.post("/query")
 async def process_query(request: QueryRequest):
+    token = None
     try:
         logger.info(f"Processing {request.agent_type} query: {request.query}")
-        
-        if request.agent_type == "support":
-            task = Task(
-                description=f"""Handle this customer support query: {request.query}
-                
-                Use the available tools to:
-                1. Search for relevant client, order, payment, or course information
-                2. Create new orders or enquiries if requested
-                3. Provide comprehensive and helpful responses
-                
-                Available tools: MongoDBTool (for data queries), ExternalAPITool (for creating orders/clients)""",
-                agent=support_agent,
-                expected_output="A detailed and helpful response to the customer support query with specific data and actionable information."
-            )
-            crew = Crew(
-                agents=[support_agent],
-                tasks=[task],
-                verbose=True
-            )
-            result = crew.kickoff()
-            return {"agent_type": "support", "response": str(result)}
-            
-        elif request.agent_type == "dashboard":
-            task = Task(
-                description=f"""Provide analytics and metrics for this business query: {request.query}
-                
-                Use the MongoDB tool to:
-                1. Calculate revenue metrics and financial insights
-                2. Analyze client statistics and behavior
-                3. Provide enrollment and attendance analytics
-                4. Generate business intelligence reports
-                
-                Available tools: MongoDBTool (for analytics queries)""",
-                agent=dashboard_agent,
-                expected_output="A comprehensive analytics report with specific metrics, trends, and business insights."
-            )
-            crew = Crew(
-                agents=[dashboard_agent],
-                tasks=[task],
-                verbose=True
-            )
-            result = crew.kickoff()
-            return {"agent_type": "dashboard", "response": str(result)}
-            
-        else:
+
+        if request.agent_type not in ("support", "dashboard"):
             raise HTTPException(status_code=400, detail="Invalid agent type. Use 'support' or 'dashboard'")
-            
+        if request.priority and request.priority not in PRIORITY_CLASSES:
+            raise HTTPException(status_code=400, detail="Invalid priority. Use 'high', 'normal' or 'low'")
+
+        session = session_store.get_or_create(request.session_id)
+        inputs = {"query": request.query, "session_context": session.context_prompt(cache_namespaces[request.agent_type])}
+        token = current_session.set(session)
+
+        result, partial = await scheduler.run(
+            request.agent_type,
+            functools.partial(crew_pools[request.agent_type].kickoff, inputs),
+            priority=request.priority,
+            deadline_seconds=request.deadline_seconds
+        )
+        if not partial:
+            session.add_turn(request.agent_type, request.query, str(result))
+        return {
+            "agent_type": request.agent_type,
+            "response": str(result),
+            "session_id": session.session_id,
+            "partial": partial
+        }
+
+    except HTTPException:
+        raise
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except QueueTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         logger.error(f"Error processing query: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error processing query: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error processing query: {str(e)}")
+    finally:
+        if token is not None:
+            current_session.reset(token)
@@ -0,0 +1,230 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import dotenv
+
+dotenv.load_dotenv()
+
+# Lower value runs first
+PRIORITY_CLASSES = {"high": 0, "normal": 1, "low": 2}
+DEFAULT_PRIORITY = {"dashboard": "high", "support": "normal"}
+
+AGENT_CONCURRENCY = {
+    "support": int(os.getenv("SUPPORT_MAX_CONCURRENCY", "2")),
+    "dashboard": int(os.getenv("DASHBOARD_MAX_CONCURRENCY", "4")),
+}
+MAX_TOTAL_CONCURRENCY = int(os.getenv("MAX_TOTAL_CONCURRENCY", "4"))
+MAX_QUEUE_DEPTH = int(os.getenv("MAX_QUEUE_DEPTH", "50"))
+DEFAULT_DEADLINE_SECONDS = float(os.getenv("DEFAULT_DEADLINE_SECONDS", "60"))
+MAX_DEADLINE_SECONDS = float(os.getenv("MAX_DEADLINE_SECONDS", "300"))
+MAX_TOOL_CALLS = int(os.getenv("MAX_TOOL_CALLS", "15"))
+PARTIAL_RESULT_CHARS = int(os.getenv("PARTIAL_RESULT_CHARS", "1000"))
+
+
+class QueueFullError(Exception):
+    """Raised when the wait queue is at MAX_QUEUE_DEPTH"""
+
+
+class QueueTimeoutError(Exception):
+    """Raised when a request's deadline passes before it gets a slot"""
+
+
+class RunBudget:
+    """Deadline and tool call cap for a single crew run, checked by the tools"""
+
+    def __init__(self, deadline: float, max_tool_calls: int = MAX_TOOL_CALLS):
+        self.deadline = deadline
+        self.max_tool_calls = max_tool_calls
+        self.tool_calls = 0
+        self.cancelled = False
+        self._observations = []
+        self._lock = threading.Lock()
+
+    def check(self, tool_name: str) -> Optional[str]:
+        """Count a tool call; return a stop message if the run must wind down"""
+        with self._lock:
+            if self.cancelled or time.monotonic() >= self.deadline:
+                self.cancelled = True
+                return "Error: deadline exceeded. Stop calling tools and give your final answer with what you have."
+            if self.tool_calls >= self.max_tool_calls:
+                return f"Error: tool call limit ({self.max_tool_calls}) reached. Stop calling tools and give your final answer with what you have."
+            self.tool_calls += 1
+            return None
+
+    def record(self, tool_name: str, input_data: Any, result: str):
+        """Keep tool outputs so a cancelled run can still return something useful"""
+        with self._lock:
+            self._observations.append((tool_name, json.dumps(input_data, default=str), result))
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled = True
+
+    def partial_result(self) -> str:
+        with self._lock:
+            observations = list(self._observations)
+        if not observations:
+            return "The request timed out before any data was retrieved."
+        lines = ["The request timed out before the agent finished. Data retrieved so far:"]
+        for tool_name, input_str, result in observations:
+            if len(result) > PARTIAL_RESULT_CHARS:
+                result = result[:PARTIAL_RESULT_CHARS] + "...[truncated]"
+            lines.append(f"- {tool_name} {input_str}: {result}")
+        return "\n".join(lines)
+
+
+# Budget of the crew run currently executing; copied into the worker thread
+current_budget: contextvars.ContextVar = contextvars.ContextVar("current_budget", default=None)
+
+
+class CrewScheduler:
+    """Runs crews with per-agent-type concurrency limits, priority ordering and deadlines"""
+
+    def __init__(self, limits: Dict[str, int] = None, max_total: int = MAX_TOTAL_CONCURRENCY,
+                 max_queue_depth: int = MAX_QUEUE_DEPTH):
+        self._limits = dict(limits or AGENT_CONCURRENCY)
+        self._max_total = max_total
+        self._max_queue_depth = max_queue_depth
+        self._running = {agent_type: 0 for agent_type in self._limits}
+        self._waiters = []
+        self._seq = itertools.count()
+        self._metrics = {
+            "started": 0,
+            "completed": 0,
+            "failed": 0,
+            "timed_out": 0,
+            "queue_timeouts": 0,
+            "rejected": 0,
+            "total_wait_seconds": 0.0,
+        }
+
+    def _can_start(self, agent_type: str) -> bool:
+        return (self._running[agent_type] < self._limits[agent_type]
+                and sum(self._running.values()) < self._max_total)
+
+    def _dispatch(self):
+        """Grant free slots to waiters in (priority, arrival) order"""
+        for waiter in sorted(self._waiters):
+            _, _, agent_type, future = waiter
+            if future.done():
+                self._waiters.remove(waiter)
+                continue
+            if self._can_start(agent_type):
+                self._waiters.remove(waiter)
+                self._running[agent_type] += 1
+                future.set_result(None)
+        heapq.heapify(self._waiters)
+
+    def _release(self, agent_type: str):
+        self._running[agent_type] -= 1
+        self._dispatch()
+
+    async def _acquire(self, agent_type: str, priority: int, timeout: float):
+        if len(self._waiters) >= self._max_queue_depth:
+            self._metrics["rejected"] += 1
+            raise QueueFullError("Too many queued requests, try again later")
+
+        future = asyncio.get_running_loop().create_future()
+        waiter = (priority, next(self._seq), agent_type, future)
+        heapq.heappush(self._waiters, waiter)
+        self._dispatch()
+        try:
+            await asyncio.wait_for(future, timeout=max(timeout, 0))
+        except asyncio.TimeoutError:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+                heapq.heapify(self._waiters)
+            self._metrics["queue_timeouts"] += 1
+            raise QueueTimeoutError("Deadline exceeded while waiting for a free slot")
+
+    async def run(self, agent_type: str, fn: Callable[[], Any], priority: Optional[str] = None,
+                  deadline_seconds: Optional[float] = None) -> Tuple[Any, bool]:
+        """Run fn in a worker thread once a slot is free.
+
+        Returns (result, partial). When the deadline passes, the run is cancelled
+        through its RunBudget and the data gathered so far is returned with partial=True.
+        """
+        if agent_type not in self._limits:
+            raise ValueError(f"Unknown agent type: {agent_type}")
+        priority = priority or DEFAULT_PRIORITY.get(agent_type, "normal")
+        if priority not in PRIORITY_CLASSES:
+            raise ValueError(f"Invalid priority. Use one of: {', '.join(PRIORITY_CLASSES)}")
+        deadline_seconds = min(deadline_seconds or DEFAULT_DEADLINE_SECONDS, MAX_DEADLINE_SECONDS)
+
+        queued_at = time.monotonic()
+        deadline = queued_at + deadline_seconds
+        await self._acquire(agent_type, PRIORITY_CLASSES[priority], deadline_seconds)
+        self._metrics["started"] += 1
+        self._metrics["total_wait_seconds"] += time.monotonic() - queued_at
+
+        budget = RunBudget(deadline)
+        task = None
+        try:
+            token = current_budget.set(budget)
+            try:
+                task = asyncio.ensure_future(asyncio.to_thread(fn))
+            finally:
+                current_budget.reset(token)
+
+            done, _ = await asyncio.wait({task}, timeout=max(deadline - time.monotonic(), 0))
+            if not done:
+                self._metrics["timed_out"] += 1
+                return budget.partial_result(), True
+            if task.exception() is not None:
+                self._metrics["failed"] += 1
+                raise task.exception()
+            self._metrics["completed"] += 1
+            return task.result(), False
+        finally:
+            if task is not None and not task.done():
+                # Timed out or the request was cancelled. The thread cannot be killed;
+                # the budget makes its next tool call stop the agent, and the slot
+                # stays taken until the thread actually exits.
+                budget.cancel()
+
+                def _on_late_finish(t):
+                    try:
+                        if not t.cancelled():
+                            t.exception()  # mark as retrieved; the caller is gone
+                    finally:
+                        self._release(agent_type)
+
+                task.add_done_callback(_on_late_finish)
+            else:
+                self._release(agent_type)
+
+    def metrics(self) -> Dict[str, Any]:
+        queued = {agent_type: 0 for agent_type in self._limits}
+        for _, _, agent_type, future in self._waiters:
+            if not future.done():
+                queued[agent_type] += 1
+        started = self._metrics["started"]
+        return {
+            **self._metrics,
+            "avg_wait_seconds": self._metrics["total_wait_seconds"] / started if started else 0.0,
+            "running": dict(self._running),
+            "queue_depth": queued,
+            "limits": dict(self._limits),
+        }
+
+
+def check_budget(tool_name: str) -> Optional[str]:
+    """Called by tools before doing work; returns a stop message when over budget"""
+    budget = current_budget.get()
+    return budget.check(tool_name) if budget else None
+
+
+def record_tool_result(tool_name: str, input_data: Any, result: str):
+    budget = current_budget.get()
+    if budget:
+        budget.record(tool_name, input_data, result)
+
+
+scheduler = CrewScheduler()
@@ -0,0 +1,163 @@
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import dotenv
+
+dotenv.load_dotenv()
+
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", "1800"))
+MAX_SESSIONS = int(os.getenv("MAX_SESSIONS", "1000"))
+SESSION_MAX_TURNS = int(os.getenv("SESSION_MAX_TURNS", "4"))
+SESSION_TURN_CHARS = int(os.getenv("SESSION_TURN_CHARS", "600"))
+TOOL_CACHE_MAX_ENTRIES = int(os.getenv("TOOL_CACHE_MAX_ENTRIES", "32"))
+TOOL_CACHE_TTL_SECONDS = int(os.getenv("TOOL_CACHE_TTL_SECONDS", "300"))
+TOOL_CACHE_MAX_RESULT_CHARS = int(os.getenv("TOOL_CACHE_MAX_RESULT_CHARS", "20000"))
+SESSION_CONTEXT_CHARS = int(os.getenv("SESSION_CONTEXT_CHARS", "2000"))
+SESSION_TOOL_CONTEXT_CHARS = int(os.getenv("SESSION_TOOL_CONTEXT_CHARS", "600"))
+
+# Session of the request currently being processed; tools read it to reuse results
+current_session: contextvars.ContextVar = contextvars.ContextVar("current_session", default=None)
+
+
+def _truncate(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[:limit] + "...[truncated]"
+
+
+def tool_cache_key(tool_name: str, input_data: Dict[str, Any]) -> str:
+    """Build a stable cache key for a tool call"""
+    return f"{tool_name}:{json.dumps(input_data, sort_keys=True, default=str)}"
+
+
+class Session:
+    """Compacted conversation memory and tool result cache for one session"""
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.last_used = time.monotonic()
+        self._turns = []
+        self._tool_cache: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add_turn(self, agent_type: str, query: str, response: str):
+        """Record a turn, keeping only the most recent (truncated) turns"""
+        with self._lock:
+            self._turns.append({
+                "agent_type": agent_type,
+                "query": _truncate(query, SESSION_TURN_CHARS),
+                "response": _truncate(response, SESSION_TURN_CHARS)
+            })
+            del self._turns[:-SESSION_MAX_TURNS]
+
+    def get_tool_result(self, key: str) -> Optional[str]:
+        """Return a cached tool result if present and not expired"""
+        with self._lock:
+            entry = self._tool_cache.get(key)
+            if entry is None:
+                return None
+            expires_at, result = entry
+            if expires_at < time.monotonic():
+                del self._tool_cache[key]
+                return None
+            self._tool_cache.move_to_end(key)
+            return result
+
+    def put_tool_result(self, key: str, result: str):
+        """Cache a tool result, evicting the least recently used entries"""
+        if len(result) > TOOL_CACHE_MAX_RESULT_CHARS:
+            return
+        with self._lock:
+            self._tool_cache[key] = (time.monotonic() + TOOL_CACHE_TTL_SECONDS, result)
+            self._tool_cache.move_to_end(key)
+            while len(self._tool_cache) > TOOL_CACHE_MAX_ENTRIES:
+                self._tool_cache.popitem(last=False)
+
+    def invalidate_tool_results(self):
+        """Drop cached tool results, e.g. after a write action"""
+        with self._lock:
+            self._tool_cache.clear()
+
+    def context_prompt(self, cache_namespaces=()) -> str:
+        """Render compacted history and cached tool calls within SESSION_CONTEXT_CHARS.
+
+        Only cached calls in cache_namespaces (the current agent's tools) are listed.
+        The tool call list gets its own budget and turns are added newest first,
+        so when the cap is hit it is the oldest turns that are dropped.
+        """
+        prefixes = tuple(f"{namespace}:" for namespace in cache_namespaces)
+        with self._lock:
+            now = time.monotonic()
+            turns = list(self._turns)
+            keys = [k for k, (exp, _) in self._tool_cache.items() if exp >= now and k.startswith(prefixes)]
+
+        if not turns and not keys:
+            return ""
+
+        tool_lines = []
+        if keys:
+            # Only the calls are listed; repeating one is answered from the cache
+            tool_lines = ["", "Tool calls already made in this session (repeating them is instant):"]
+            used = len(tool_lines[1])
+            for key in reversed(keys):
+                line = f"- {key}"
+                if used + len(line) + 1 > SESSION_TOOL_CONTEXT_CHARS:
+                    break
+                tool_lines.append(line)
+                used += len(line) + 1
+
+        header = "Conversation so far (most recent last):"
+        remaining = SESSION_CONTEXT_CHARS - len(header) - len("\n".join(tool_lines)) - 1
+        turn_blocks = []
+        for turn in reversed(turns):
+            block = f"- User: {turn['query']}\n  Assistant: {turn['response']}"
+            if not turn_blocks:
+                block = _truncate(block, max(remaining, 0))
+            elif len(block) + 1 > remaining:
+                break
+            turn_blocks.insert(0, block)
+            remaining -= len(block) + 1
+
+        return "\n".join([header] + turn_blocks + tool_lines)
+
+
+class SessionStore:
+    """In-memory session store with idle expiry and a cap on live sessions"""
+
+    def __init__(self, ttl_seconds: int = SESSION_TTL_SECONDS, max_sessions: int = MAX_SESSIONS):
+        self._ttl_seconds = ttl_seconds
+        self._max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_create(self, session_id: Optional[str] = None) -> Session:
+        """Return the live session for session_id, or a new session with a fresh id.
+
+        Unknown or expired ids are never adopted, so clients cannot pick session ids.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._evict_expired(now)
+            session = self._sessions.get(session_id) if session_id else None
+            if session is None:
+                session = Session(uuid.uuid4().hex)
+                self._sessions[session.session_id] = session
+                while len(self._sessions) > self._max_sessions:
+                    self._sessions.popitem(last=False)
+            session.last_used = now
+            self._sessions.move_to_end(session.session_id)
+            return session
+
+    def _evict_expired(self, now: float):
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.last_used <= self._ttl_seconds:
+                break
+            del self._sessions[session_id]
+
+
+session_store = SessionStore()
@@ -3,6 +3,8 @@ from crewai.tools.base_tool import BaseTool
 from pydantic import PrivateAttr
 import json
 from typing import Dict, Any
+from app.session_store import current_session
+from app.scheduler import check_budget, record_tool_result
 
 class ExternalAPITool(BaseTool):
     name: str = "ExternalAPITool"
@@ -88,18 +90,26 @@ class ExternalAPITool(BaseTool):
             if not action:
                 return "Error: 'action' field is required."
 
+            stop_message = check_budget(self.name)
+            if stop_message:
+                return stop_message
+
             # Route to appropriate method
             if action == "create_client":
                 result = self.create_client(actual_input.get("client_data", {}))
-                return json.dumps(result)
             elif action == "create_order":
                 result = self.create_order(actual_input.get("order_data", {}))
-                return json.dumps(result)
             elif action == "create_enquiry":
                 result = self.create_enquiry(actual_input.get("enquiry_data", {}))
-                return json.dumps(result)
             else:
                 return f"Unknown action: {action}"
+
+            # Writes make previously cached lookups for this session stale
+            session = current_session.get()
+            if session and result.get("success"):
+                session.invalidate_tool_results()
+            record_tool_result(self.name, actual_input, json.dumps(result))
+            return json.dumps(result)
                 
         except Exception as e:
             return f"Error executing External API operation: {str(e)}"
@@ -1,32 +1,152 @@
 from pymongo import MongoClient
+from pymongo.read_preferences import Primary, SecondaryPreferred
 from crewai.tools.base_tool import BaseTool
 from pydantic import PrivateAttr
 import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List
 from bson import ObjectId
 import json
+import os
+from app.session_store import current_session, tool_cache_key
+from app.scheduler import check_budget, record_tool_result
+
+# Defaults per workload. Each tool instance owns its own MongoClient, so support
+# lookups and dashboard analytics never share a connection pool.
+WORKLOADS = {
+    "support": {
+        "read_preference": Primary(),
+        "max_pool_size": int(os.getenv("SUPPORT_MONGO_MAX_POOL_SIZE", "50")),
+        "max_time_ms": int(os.getenv("SUPPORT_MONGO_MAX_TIME_MS", "5000")),
+        "allow_disk_use": False,
+    },
+    "analytics": {
+        # maxStalenessSeconds must be at least 90
+        "read_preference": SecondaryPreferred(
+            max_staleness=int(os.getenv("ANALYTICS_MAX_STALENESS_SECONDS", "120"))
+        ),
+        "max_pool_size": int(os.getenv("ANALYTICS_MONGO_MAX_POOL_SIZE", "10")),
+        "max_time_ms": int(os.getenv("ANALYTICS_MONGO_MAX_TIME_MS", "30000")),
+        "allow_disk_use": True,
+    },
+}
+
+# Per-action overrides applied on top of each workload's defaults
+ACTION_OPTIONS = {
+    "support": {},
+    "analytics": {
+        "get_outstanding_balances": {"max_time_ms": 60000},
+        "get_top_courses": {"max_time_ms": 60000},
+        "get_enrollment_trends": {"max_time_ms": 60000},
+    },
+}
+
+# Orders that may still have an amount due, and payments that count towards it.
+OUTSTANDING_ORDER_STATUSES = ["pending", "partial"]
+COUNTED_PAYMENT_STATUSES = ["completed", "partial"]
+# Every status the queries know about; ingest rejects anything else
+ORDER_STATUSES = OUTSTANDING_ORDER_STATUSES + ["paid", "cancelled"]
+PAYMENT_STATUSES = COUNTED_PAYMENT_STATUSES + ["pending", "failed", "refunded"]
+
+# Indexes backing get_outstanding_balances, created at startup by the support
+# (primary) workload. create_index is a no-op when the index already exists.
+INDEXES = {
+    "orders": [[("status", 1), ("client_id", 1), ("order_date", 1)]],
+    "payments": [[("order_id", 1), ("status", 1)]],
+}
+
+# One compact example per action. Each agent's tool description lists only the
+# actions it is allowed to use, which keeps every LLM turn's prompt small.
+ACTIONS = {
+    "find_client": '{"action": "find_client", "query": {"email": "priya@example.com"}} (or name/phone)',
+    "get_client_orders": '{"action": "get_client_orders", "client_email": "priya@example.com"}',
+    "get_order_by_id": '{"action": "get_order_by_id", "order_id": "1234567890abcdef12345678"}',
+    "get_payment_info": '{"action": "get_payment_info", "order_id": "1234567890abcdef12345678"}',
+    "get_outstanding_balances": '{"action": "get_outstanding_balances", "client_email": "john@example.com", "group_by": "order", "limit": 20} (optional client_email, group_by order/client, skip)',
+    "get_classes_for_week": '{"action": "get_classes_for_week", "start_date": "2025-06-01", "end_date": "2025-06-07"}',
+    "get_courses_by_instructor": '{"action": "get_courses_by_instructor", "instructor": "Anjali"}',
+    "get_upcoming_classes": '{"action": "get_upcoming_classes"}',
+    "calculate_revenue": '{"action": "calculate_revenue", "start_date": "2025-06-01", "end_date": "2025-06-30"}',
+    "get_client_stats": '{"action": "get_client_stats"}',
+    "get_attendance_stats": '{"action": "get_attendance_stats", "class_name": "Pilates"} (class_name optional)',
+    "get_top_courses": '{"action": "get_top_courses", "limit": 5}',
+    "get_enrollment_trends": '{"action": "get_enrollment_trends"}',
+}
+
+def describe_actions(actions) -> str:
+    """Build the tool description for the given actions"""
+    lines = ["Query business data. Input is a JSON string with one of these actions:"]
+    lines += [f"- {ACTIONS[action]}" for action in actions]
+    return "\n".join(lines)
 
 class MongoDBTool(BaseTool):
     name: str = "MongoDBTool"
-    description: str = """Comprehensive MongoDB tool for client, order, payment, course, and class management.
-    Use this tool with properly formatted JSON strings for different actions:
-    
-    Examples:
-    - Find client: '{"action": "find_client", "query": {"email": "priya@example.com"}}'
-    - Get upcoming classes: '{"action": "get_upcoming_classes"}'
-    - Get order by ID: '{"action": "get_order_by_id", "order_id": "1234567890abcdef12345678"}'
-    - Calculate revenue: '{"action": "calculate_revenue", "start_date": "2025-06-01", "end_date": "2025-06-30"}'
-    - Get client stats: '{"action": "get_client_stats"}'
-    - Get top courses: '{"action": "get_top_courses", "limit": 5}'
-    """
+    description: str = describe_actions(ACTIONS)
     _client: MongoClient = PrivateAttr()
     _db: object = PrivateAttr()
+    _workload: dict = PrivateAttr()
+    _workload_name: str = PrivateAttr()
+    _action_options: dict = PrivateAttr()
+    _actions: frozenset = PrivateAttr()
 
-    def __init__(self, uri, db_name, **data):
+    def __init__(self, uri, db_name, workload: str = "support", action_options: Dict[str, Dict[str, Any]] = None,
+                 actions: List[str] = None, **data):
+        actions = list(actions or ACTIONS)
+        unknown = [action for action in actions if action not in ACTIONS]
+        if unknown:
+            raise ValueError(f"Unknown actions: {', '.join(unknown)}")
+        data.setdefault("description", describe_actions(actions))
         super().__init__(**data)
-        self._client = MongoClient(uri)
-        self._db = self._client[db_name]
-        print("Connected to MongoDB:", self._db.list_collection_names())
+        self._actions = frozenset(actions)
+        if workload not in WORKLOADS:
+            raise ValueError(f"Unknown workload '{workload}'. Use one of: {', '.join(WORKLOADS)}")
+        self._workload = WORKLOADS[workload]
+        self._workload_name = workload
+        self._action_options = action_options or {}
+        self._client = MongoClient(
+            uri,
+            maxPoolSize=self._workload["max_pool_size"],
+            appname=f"agentic-ai-{workload}"
+        )
+        self._db = self._client.get_database(db_name, read_preference=self._workload["read_preference"])
+        print(f"Connected to MongoDB ({workload}):", self._db.list_collection_names())
+        if workload == "support":
+            self._ensure_indexes()
+
+    def _ensure_indexes(self):
+        """Create the indexes the aggregations rely on, if missing"""
+        for collection, indexes in INDEXES.items():
+            for keys in indexes:
+                self._db[collection].create_index(keys)
+
+    @property
+    def cache_namespace(self) -> str:
+        """Session cache namespace; results read on different workloads are never shared"""
+        return f"{self.name}[{self._workload_name}]"
+
+    def _options(self, action: str) -> Dict[str, Any]:
+        """Resolve read preference, maxTimeMS and allowDiskUse for an action"""
+        options = dict(self._workload)
+        options.update(ACTION_OPTIONS[self._workload_name].get(action, {}))
+        options.update(self._action_options.get(action, {}))
+        return options
+
+    def _collection(self, name: str, action: str):
+        """Get a collection bound to the action's read preference"""
+        return self._db.get_collection(name, read_preference=self._options(action)["read_preference"])
+
+    def _find(self, name: str, action: str, *args, **kwargs):
+        return self._collection(name, action).find(*args, max_time_ms=self._options(action)["max_time_ms"], **kwargs)
+
+    def _find_one(self, name: str, action: str, *args, **kwargs):
+        return self._collection(name, action).find_one(*args, max_time_ms=self._options(action)["max_time_ms"], **kwargs)
+
+    def _aggregate(self, name: str, action: str, pipeline: list):
+        options = self._options(action)
+        return list(self._collection(name, action).aggregate(
+            pipeline,
+            allowDiskUse=options["allow_disk_use"],
+            maxTimeMS=options["max_time_ms"]
+        ))
 
     def find_client(self, query: Dict[str, Any]):
         """Find client by name, email, or phone"""
@@ -39,7 +159,7 @@ class MongoDBTool(BaseTool):
             if "phone" in query:
                 search_query["phone"] = query["phone"]
             
-            result = self._db.clients.find_one(search_query, {"_id": 0})
+            result = self._find_one("clients", "find_client", search_query, {"_id": 0})
             return result if result else "Client not found"
         except Exception as e:
             return f"Error: {str(e)}"
@@ -47,11 +167,11 @@ class MongoDBTool(BaseTool):
     def get_client_orders(self, client_email: str):
         """Get all orders for a specific client by email"""
         try:
-            client = self._db.clients.find_one({"email": client_email})
+            client = self._find_one("clients", "get_client_orders", {"email": client_email})
             if not client:
                 return "Client not found"
             
-            orders = list(self._db.orders.find({"client_id": client["_id"]}, {"_id": 0}))
+            orders = list(self._find("orders", "get_client_orders", {"client_id": client["_id"]}, {"_id": 0}))
             return orders
         except Exception as e:
             return f"Error: {str(e)}"
@@ -59,10 +179,10 @@ class MongoDBTool(BaseTool):
     def get_order_by_id(self, order_id: str):
         """Get order details by order ID"""
         try:
-            order = self._db.orders.find_one({"_id": ObjectId(order_id)}, {"_id": 0})
+            order = self._find_one("orders", "get_order_by_id", {"_id": ObjectId(order_id)}, {"_id": 0})
             if order:
                 # Get client info
-                client = self._db.clients.find_one({"_id": order["client_id"]}, {"name": 1, "email": 1})
+                client = self._find_one("clients", "get_order_by_id", {"_id": order["client_id"]}, {"name": 1, "email": 1})
                 if client:
                     order["client_info"] = {"name": client["name"], "email": client["email"]}
             return order if order else "Order not found"
@@ -72,35 +192,113 @@ class MongoDBTool(BaseTool):
     def get_payment_info(self, order_id: str):
         """Get payment details for an order by order ID"""
         try:
-            payments = list(self._db.payments.find({"order_id": ObjectId(order_id)}, {"_id": 0}))
+            payments = list(self._find("payments", "get_payment_info", {"order_id": ObjectId(order_id)}, {"_id": 0}))
             return payments
         except Exception as e:
             return f"Error: {str(e)}"
 
-    def get_pending_payments(self):
-        """Get all pending payments"""
+    def get_outstanding_balances(self, client_email: str = None, group_by: str = "order",
+                                 skip: int = 0, limit: int = 20):
+        """Get amount still due per order or per client, optionally for one client.
+
+        Starts from pending/partial orders (orders status index) and sums each
+        order's payments server-side through the payments order_id index.
+        """
         try:
+            if group_by not in ("order", "client"):
+                return "Error: group_by must be 'order' or 'client'"
+            skip = max(int(skip), 0)
+            limit = min(max(int(limit), 1), 100)
+
+            match = {"status": {"$in": OUTSTANDING_ORDER_STATUSES}}
+            if client_email:
+                client = self._find_one("clients", "get_outstanding_balances", {"email": client_email}, {"_id": 1})
+                if not client:
+                    return "Client not found"
+                match["client_id"] = client["_id"]
+
             pipeline = [
+                {"$match": match},
                 {
                     "$lookup": {
-                        "from": "orders",
-                        "localField": "order_id",
-                        "foreignField": "_id",
-                        "as": "order_info"
+                        "from": "payments",
+                        "localField": "_id",
+                        "foreignField": "order_id",
+                        "pipeline": [
+                            {"$match": {"status": {"$in": COUNTED_PAYMENT_STATUSES}}},
+                            {"$group": {"_id": None, "paid": {"$sum": "$amount"}}}
+                        ],
+                        "as": "paid"
                     }
                 },
-                {
-                    "$match": {
-                        "$or": [
-                            {"status": "pending"},
-                            {"status": "partial"},
-                            {"order_info.status": "pending"}
-                        ]
+                {"$set": {"paid": {"$ifNull": [{"$first": "$paid.paid"}, 0]}}},
+                {"$set": {"amount_due": {"$subtract": ["$amount", "$paid"]}}},
+                {"$match": {"amount_due": {"$gt": 0}}}
+            ]
+
+            if group_by == "client":
+                pipeline += [
+                    {
+                        "$group": {
+                            "_id": "$client_id",
+                            "amount_due": {"$sum": "$amount_due"},
+                            "orders": {"$sum": 1}
+                        }
+                    },
+                    {"$sort": {"amount_due": -1, "_id": 1}}
+                ]
+                page = [
+                    {"$skip": skip},
+                    {"$limit": limit},
+                    {"$lookup": {"from": "clients", "localField": "_id", "foreignField": "_id", "as": "client"}},
+                    {
+                        "$project": {
+                            "_id": 0,
+                            "client_id": "$_id",
+                            "name": {"$first": "$client.name"},
+                            "email": {"$first": "$client.email"},
+                            "amount_due": 1,
+                            "orders": 1
+                        }
                     }
+                ]
+            else:
+                pipeline.append({"$sort": {"order_date": 1, "_id": 1}})
+                page = [
+                    {"$skip": skip},
+                    {"$limit": limit},
+                    {"$lookup": {"from": "clients", "localField": "client_id", "foreignField": "_id", "as": "client"}},
+                    {
+                        "$project": {
+                            "_id": 0,
+                            "order_id": "$_id",
+                            "client_email": {"$first": "$client.email"},
+                            "course_id": 1,
+                            "status": 1,
+                            "order_date": 1,
+                            "amount": 1,
+                            "paid": 1,
+                            "amount_due": 1
+                        }
+                    }
+                ]
+
+            pipeline.append({
+                "$facet": {
+                    "items": page,
+                    "totals": [{"$group": {"_id": None, "count": {"$sum": 1}, "amount_due": {"$sum": "$amount_due"}}}]
                 }
-            ]
-            result = list(self._db.payments.aggregate(pipeline))
-            return result
+            })
+            result = self._aggregate("orders", "get_outstanding_balances", pipeline)[0]
+            totals = result["totals"][0] if result["totals"] else {"count": 0, "amount_due": 0}
+            return {
+                "group_by": group_by,
+                "total": totals["count"],
+                "total_amount_due": totals["amount_due"],
+                "skip": skip,
+                "limit": limit,
+                "items": result["items"]
+            }
         except Exception as e:
             return f"Error: {str(e)}"
 
@@ -111,7 +309,7 @@ class MongoDBTool(BaseTool):
             end_dt = datetime.datetime.fromisoformat(end_date)
             
             query = {"date": {"$gte": start_dt, "$lte": end_dt}}
-            classes = list(self._db.classes.find(query, {"_id": 0}))
+            classes = list(self._find("classes", "get_classes_for_week", query, {"_id": 0}))
             return classes if classes else "No classes found in the selected date range."
         except Exception as e:
             return f"Error: {str(e)}"
@@ -119,7 +317,8 @@ class MongoDBTool(BaseTool):
     def get_courses_by_instructor(self, instructor: str):
         """Get courses by instructor name"""
         try:
-            courses = list(self._db.courses.find(
+            courses = list(self._find(
+                "courses", "get_courses_by_instructor",
                 {"instructor": {"$regex": instructor, "$options": "i"}},
                 {"_id": 0}
             ))
@@ -131,7 +330,8 @@ class MongoDBTool(BaseTool):
         """Get all upcoming classes"""
         try:
             current_date = datetime.datetime.now()
-            classes = list(self._db.classes.find(
+            classes = list(self._find(
+                "classes", "get_upcoming_classes",
                 {"date": {"$gte": current_date}},
                 {"_id": 0}
             ).sort("date", 1))
@@ -149,7 +349,7 @@ class MongoDBTool(BaseTool):
                 {"$match": {"payment_date": {"$gte": start_dt, "$lte": end_dt}}},
                 {"$group": {"_id": None, "total_revenue": {"$sum": "$amount"}}}
             ]
-            result = list(self._db.payments.aggregate(pipeline))
+            result = self._aggregate("payments", "calculate_revenue", pipeline)
             total = result[0]["total_revenue"] if result else 0
             return f"Total revenue: {total}"
         except Exception as e:
@@ -166,7 +366,7 @@ class MongoDBTool(BaseTool):
                     }
                 }
             ]
-            result = list(self._db.clients.aggregate(pipeline))
+            result = self._aggregate("clients", "get_client_stats", pipeline)
             return result
         except Exception as e:
             return f"Error: {str(e)}"
@@ -189,7 +389,7 @@ class MongoDBTool(BaseTool):
                     }
                 }
             ]
-            result = list(self._db.classes.aggregate(pipeline))
+            result = self._aggregate("classes", "get_attendance_stats", pipeline)
             return result
         except Exception as e:
             return f"Error: {str(e)}"
@@ -217,7 +417,7 @@ class MongoDBTool(BaseTool):
                 {"$sort": {"enrollment_count": -1}},
                 {"$limit": limit}
             ]
-            result = list(self._db.courses.aggregate(pipeline))
+            result = self._aggregate("courses", "get_top_courses", pipeline)
             return result
         except Exception as e:
             return f"Error: {str(e)}"
@@ -238,7 +438,7 @@ class MongoDBTool(BaseTool):
                 },
                 {"$sort": {"_id.year": 1, "_id.month": 1}}
             ]
-            result = list(self._db.orders.aggregate(pipeline))
+            result = self._aggregate("orders", "get_enrollment_trends", pipeline)
             return result
         except Exception as e:
             return f"Error: {str(e)}"
@@ -252,42 +452,69 @@ class MongoDBTool(BaseTool):
             action = input_data.get("action")
             if not action:
                 return "Error: 'action' field is required."
-
-            # Route to appropriate method based on action
-            if action == "find_client":
-                return json.dumps(self.find_client(input_data.get("query", {})), default=str)
-            elif action == "get_client_orders":
-                return json.dumps(self.get_client_orders(input_data.get("client_email")), default=str)
-            elif action == "get_order_by_id":
-                return json.dumps(self.get_order_by_id(input_data.get("order_id")), default=str)
-            elif action == "get_payment_info":
-                return json.dumps(self.get_payment_info(input_data.get("order_id")), default=str)
-            elif action == "get_pending_payments":
-                return json.dumps(self.get_pending_payments(), default=str)
-            elif action == "get_classes_for_week":
-                return json.dumps(self.get_classes_for_week(
-                    input_data.get("start_date"), input_data.get("end_date")
-                ), default=str)
-            elif action == "get_courses_by_instructor":
-                return json.dumps(self.get_courses_by_instructor(input_data.get("instructor")), default=str)
-            elif action == "get_upcoming_classes":
-                return json.dumps(self.get_upcoming_classes(), default=str)
-            elif action == "calculate_revenue":
-                return self.calculate_revenue(
-                    input_data.get("start_date"), input_data.get("end_date")
-                )
-            elif action == "get_client_stats":
-                return json.dumps(self.get_client_stats(), default=str)
-            elif action == "get_attendance_stats":
-                return json.dumps(self.get_attendance_stats(input_data.get("class_name")), default=str)
-            elif action == "get_top_courses":
-                return json.dumps(self.get_top_courses(input_data.get("limit", 5)), default=str)
-            elif action == "get_enrollment_trends":
-                return json.dumps(self.get_enrollment_trends(), default=str)
-            else:
+            if action not in self._actions:
                 return f"Unknown action: {action}"
+
+            stop_message = check_budget(self.name)
+            if stop_message:
+                return stop_message
+
+            # Reuse results already fetched earlier in the same session
+            session = current_session.get()
+            cache_key = tool_cache_key(self.cache_namespace, input_data)
+            if session:
+                cached = session.get_tool_result(cache_key)
+                if cached is not None:
+                    record_tool_result(self.name, input_data, cached)
+                    return cached
+
+            result = self._dispatch(action, input_data)
+            if session and not result.startswith(("Error", '"Error', "Unknown action")):
+                session.put_tool_result(cache_key, result)
+            record_tool_result(self.name, input_data, result)
+            return result
                 
         except json.JSONDecodeError as e:
             return f"Invalid JSON input: {str(e)}"
         except Exception as e:
             return f"Error executing MongoDB operation: {str(e)}"
+
+    def _dispatch(self, action: str, input_data: Dict[str, Any]) -> str:
+        """Route to appropriate method based on action"""
+        if action == "find_client":
+            return json.dumps(self.find_client(input_data.get("query", {})), default=str)
+        elif action == "get_client_orders":
+            return json.dumps(self.get_client_orders(input_data.get("client_email")), default=str)
+        elif action == "get_order_by_id":
+            return json.dumps(self.get_order_by_id(input_data.get("order_id")), default=str)
+        elif action == "get_payment_info":
+            return json.dumps(self.get_payment_info(input_data.get("order_id")), default=str)
+        elif action == "get_outstanding_balances":
+            return json.dumps(self.get_outstanding_balances(
+                input_data.get("client_email"),
+                input_data.get("group_by", "order"),
+                input_data.get("skip", 0),
+                input_data.get("limit", 20)
+            ), default=str)
+        elif action == "get_classes_for_week":
+            return json.dumps(self.get_classes_for_week(
+                input_data.get("start_date"), input_data.get("end_date")
+            ), default=str)
+        elif action == "get_courses_by_instructor":
+            return json.dumps(self.get_courses_by_instructor(input_data.get("instructor")), default=str)
+        elif action == "get_upcoming_classes":
+            return json.dumps(self.get_upcoming_classes(), default=str)
+        elif action == "calculate_revenue":
+            return self.calculate_revenue(
+                input_data.get("start_date"), input_data.get("end_date")
+            )
+        elif action == "get_client_stats":
+            return json.dumps(self.get_client_stats(), default=str)
+        elif action == "get_attendance_stats":
+            return json.dumps(self.get_attendance_stats(input_data.get("class_name")), default=str)
+        elif action == "get_top_courses":
+            return json.dumps(self.get_top_courses(input_data.get("limit", 5)), default=str)
+        elif action == "get_enrollment_trends":
+            return json.dumps(self.get_enrollment_trends(), default=str)
+        else:
+            return f"Unknown action: {action}"
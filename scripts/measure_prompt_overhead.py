@@ -0,0 +1,75 @@
+import time
+import dotenv
+
+dotenv.load_dotenv()
+
+from crewai.llms.base_llm import BaseLLM
+from app.crews import build_support_crew, build_dashboard_crew
+
+ITERATIONS = 50
+INPUTS = {"query": "What does client john@example.com still owe?", "session_context": ""}
+
+try:
+    import tiktoken
+    encoding = tiktoken.get_encoding("cl100k_base")
+
+    def count_tokens(text):
+        return len(encoding.encode(text))
+except Exception:
+    def count_tokens(text):
+        # Rough estimate when the tiktoken encoding is not available
+        return len(text) // 4
+
+
+class CapturingLLM(BaseLLM):
+    """Stand-in LLM that records the prompt it is sent and answers immediately"""
+
+    def __init__(self, **data):
+        super().__init__(**data)
+        self._prompts = []
+
+    @property
+    def prompts(self):
+        return self._prompts
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None,
+             from_task=None, from_agent=None, response_model=None):
+        if isinstance(messages, str):
+            messages = [{"role": "user", "content": messages}]
+        self._prompts.append("\n".join(m["content"] for m in messages))
+        return "Thought: I now know the final answer\nFinal Answer: ok"
+
+    def supports_function_calling(self):
+        return False
+
+
+def prepare(crew, llm):
+    crew.verbose = False
+    for agent in crew.agents:
+        agent.llm = llm
+        agent.verbose = False
+    return crew
+
+
+for agent_type, build in [("support", build_support_crew), ("dashboard", build_dashboard_crew)]:
+    llm = CapturingLLM(model="capture")
+
+    # Prompt sent on the first LLM turn; every later turn resends it plus the new steps
+    prepare(build(), llm).kickoff(inputs=INPUTS)
+    prompt = llm.prompts[-1]
+
+    # Per-request overhead without LLM latency: building a crew for every request
+    # versus kicking off one built at startup
+    started = time.perf_counter()
+    for _ in range(ITERATIONS):
+        prepare(build(), llm).kickoff(inputs=INPUTS)
+    build_ms = (time.perf_counter() - started) * 1000 / ITERATIONS
+
+    crew = prepare(build(), llm)
+    started = time.perf_counter()
+    for _ in range(ITERATIONS):
+        crew.kickoff(inputs=INPUTS)
+    prebuilt_ms = (time.perf_counter() - started) * 1000 / ITERATIONS
+
+    print(f"{agent_type}: first-turn prompt {len(prompt)} chars, {count_tokens(prompt)} tokens")
+    print(f"{agent_type}: build + kickoff {build_ms:.1f} ms, prebuilt kickoff {prebuilt_ms:.1f} ms per request")
@@ -126,5 +126,11 @@ db.payments.insert_many(payments)
 db.courses.insert_many(courses)
 db.classes.insert_many(classes)
 
+# Dropping the collections above also dropped their indexes; recreate the ones
+# MongoDBTool creates at startup so a reseed does not leave them missing
+db.orders.create_index([("status", 1), ("client_id", 1), ("order_date", 1)])
+db.payments.create_index([("order_id", 1), ("status", 1)])
+db.clients.create_index("email", unique=True)
+
 print("Mock data inserted successfully!")
 client.close()
\ No newline at end of file
@@ -88,10 +88,15 @@ if st.button("Submit Query", use_container_width=True):
             try:
                 response = requests.post(
                     "http://backend:8000/query",
-                    json={"query": query, "agent_type": agent_type.lower()}
+                    json={
+                        "query": query,
+                        "agent_type": agent_type.lower(),
+                        "session_id": st.session_state.get("session_id")
+                    }
                 )
                 if response.status_code == 200:
                     result = response.json()
+                    st.session_state["session_id"] = result.get("session_id")
                     st.session_state["history"].insert(0, {
                         "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                         "agent": agent_icons[agent_type],
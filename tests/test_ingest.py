@@ -0,0 +1,44 @@
+import pytest
+from bson import ObjectId
+from pydantic import ValidationError
+
+from app.ingest import ClientRecord, OrderRecord, PaymentRecord, to_upsert
+
+ORDER_ID = "1234567890abcdef12345678"
+CLIENT_ID = "1234567890abcdef12345679"
+COURSE_ID = "1234567890abcdef12345601"
+
+
+def test_partial_client_record_only_sets_sent_fields():
+    op = to_upsert("clients", ClientRecord.model_validate({"name": "Priya", "email": "priya@example.com"}))
+    assert op._filter == {"email": "priya@example.com"}
+    assert op._doc["$set"] == {"name": "Priya", "email": "priya@example.com"}
+    assert op._doc["$setOnInsert"] == {"phone": None, "enrolled_services": [], "status": "active"}
+
+
+def test_order_upsert_converts_ids_and_keeps_status_on_insert_only():
+    record = OrderRecord.model_validate({
+        "_id": ORDER_ID,
+        "client_id": CLIENT_ID,
+        "course_id": COURSE_ID,
+        "amount": 6000,
+        "order_date": "2025-06-01T00:00:00",
+    })
+    op = to_upsert("orders", record)
+    assert op._filter == {"_id": ObjectId(ORDER_ID)}
+    assert op._doc["$set"]["client_id"] == ObjectId(CLIENT_ID)
+    assert "status" not in op._doc["$set"]
+    assert op._doc["$setOnInsert"] == {"status": "pending"}
+
+
+@pytest.mark.parametrize("status", ["Completed", "paid"])
+def test_unknown_payment_status_is_rejected(status):
+    with pytest.raises(ValidationError):
+        PaymentRecord.model_validate({
+            "_id": ORDER_ID,
+            "order_id": ORDER_ID,
+            "client_id": CLIENT_ID,
+            "amount": 3000,
+            "payment_date": "2025-06-02T00:00:00",
+            "status": status,
+        })
@@ -0,0 +1,127 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.scheduler import (
+    CrewScheduler,
+    QueueFullError,
+    QueueTimeoutError,
+    check_budget,
+    record_tool_result,
+)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_per_agent_and_total_limits():
+    async def scenario():
+        scheduler = CrewScheduler(limits={"support": 1, "dashboard": 3}, max_total=2)
+        peak = {"support": 0, "dashboard": 0, "total": 0}
+        lock = threading.Lock()
+        active = {"support": 0, "dashboard": 0}
+
+        def job(agent_type):
+            def fn():
+                with lock:
+                    active[agent_type] += 1
+                    peak[agent_type] = max(peak[agent_type], active[agent_type])
+                    peak["total"] = max(peak["total"], sum(active.values()))
+                time.sleep(0.05)
+                with lock:
+                    active[agent_type] -= 1
+            return fn
+
+        await asyncio.gather(*[scheduler.run(a, job(a)) for a in ["support"] * 3 + ["dashboard"] * 3])
+        return scheduler, peak
+
+    scheduler, peak = run(scenario())
+    assert peak["support"] == 1
+    assert peak["total"] == 2
+    assert scheduler.metrics()["completed"] == 6
+    assert scheduler.metrics()["running"] == {"support": 0, "dashboard": 0}
+
+
+def test_priority_order():
+    async def scenario():
+        scheduler = CrewScheduler(limits={"support": 1}, max_total=1)
+        order = []
+        blocker = asyncio.ensure_future(scheduler.run("support", lambda: time.sleep(0.1)))
+        await asyncio.sleep(0.02)
+        waiting = [
+            scheduler.run("support", lambda p=p: order.append(p), priority=p)
+            for p in ("low", "normal", "high")
+        ]
+        await asyncio.gather(blocker, *waiting)
+        return order
+
+    assert run(scenario()) == ["high", "normal", "low"]
+
+
+def test_queue_full():
+    async def scenario():
+        scheduler = CrewScheduler(limits={"support": 1}, max_total=1, max_queue_depth=1)
+        blocker = asyncio.ensure_future(scheduler.run("support", lambda: time.sleep(0.1)))
+        await asyncio.sleep(0.02)
+        queued = asyncio.ensure_future(scheduler.run("support", lambda: None))
+        await asyncio.sleep(0.01)
+        with pytest.raises(QueueFullError):
+            await scheduler.run("support", lambda: None)
+        await asyncio.gather(blocker, queued)
+        return scheduler.metrics()
+
+    assert run(scenario())["rejected"] == 1
+
+
+def test_queue_timeout():
+    async def scenario():
+        scheduler = CrewScheduler(limits={"support": 1}, max_total=1)
+        blocker = asyncio.ensure_future(scheduler.run("support", lambda: time.sleep(0.2)))
+        await asyncio.sleep(0.02)
+        with pytest.raises(QueueTimeoutError):
+            await scheduler.run("support", lambda: None, deadline_seconds=0.05)
+        await blocker
+        return scheduler.metrics()
+
+    metrics = run(scenario())
+    assert metrics["queue_timeouts"] == 1
+    assert metrics["queue_depth"] == {"support": 0}
+
+
+def test_timed_out_run_returns_partial_and_releases_slot_when_thread_exits():
+    async def scenario():
+        scheduler = CrewScheduler(limits={"dashboard": 1}, max_total=1)
+
+        def slow():
+            record_tool_result("MongoDBTool", {"action": "get_client_stats"}, "[]")
+            while check_budget("MongoDBTool") is None:
+                time.sleep(0.01)
+
+        result, partial = await scheduler.run("dashboard", slow, deadline_seconds=0.05)
+        running_after_timeout = scheduler.metrics()["running"]["dashboard"]
+        await asyncio.sleep(0.1)
+        return result, partial, running_after_timeout, scheduler.metrics()
+
+    result, partial, running_after_timeout, metrics = run(scenario())
+    assert partial
+    assert "get_client_stats" in result
+    assert running_after_timeout == 1
+    assert metrics["running"] == {"dashboard": 0}
+    assert metrics["timed_out"] == 1
+
+
+def test_cancelled_request_releases_slot():
+    async def scenario():
+        scheduler = CrewScheduler(limits={"dashboard": 1}, max_total=1)
+        task = asyncio.ensure_future(scheduler.run("dashboard", lambda: time.sleep(0.05)))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await asyncio.sleep(0.1)
+        return scheduler.metrics()
+
+    assert run(scenario())["running"] == {"dashboard": 0}
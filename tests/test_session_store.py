@@ -0,0 +1,54 @@
+from app import session_store
+from app.session_store import Session, SessionStore
+
+
+def test_unknown_session_id_gets_fresh_id():
+    store = SessionStore()
+    session = store.get_or_create("chosen-by-client")
+    assert session.session_id != "chosen-by-client"
+    assert store.get_or_create(session.session_id) is session
+
+
+def test_expired_session_is_replaced():
+    store = SessionStore(ttl_seconds=0)
+    session = store.get_or_create()
+    session.last_used -= 1
+    assert store.get_or_create(session.session_id) is not session
+
+
+def test_context_keeps_newest_turn_and_tool_calls_under_cap():
+    session = Session("s")
+    for i in range(4):
+        session.add_turn("support", f"question {i}", f"ANSWER{i} " + "x" * 800)
+    session.put_tool_result('MongoDBTool[support]:{"action": "find_client"}', "{}")
+
+    context = session.context_prompt(["MongoDBTool[support]"])
+
+    assert len(context) <= session_store.SESSION_CONTEXT_CHARS
+    assert "question 3" in context
+    assert "ANSWER3" in context
+    assert "find_client" in context
+    assert "ANSWER0" not in context
+
+
+def test_tool_cache_expires_and_evicts(monkeypatch):
+    monkeypatch.setattr(session_store, "TOOL_CACHE_MAX_ENTRIES", 2)
+    session = Session("s")
+    for key in ("a", "b", "c"):
+        session.put_tool_result(key, key)
+    assert session.get_tool_result("a") is None
+    assert session.get_tool_result("c") == "c"
+
+    session.invalidate_tool_results()
+    assert session.get_tool_result("c") is None
+
+
+def test_context_only_lists_calls_for_the_agents_namespaces():
+    session = Session("s")
+    session.put_tool_result('MongoDBTool[support]:{"action": "find_client"}', "{}")
+    session.put_tool_result('MongoDBTool[analytics]:{"action": "calculate_revenue"}', "{}")
+
+    context = session.context_prompt(["MongoDBTool[support]"])
+
+    assert "find_client" in context
+    assert "calculate_revenue" not in context